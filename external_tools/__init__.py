@@ -4,31 +4,105 @@ Tools exposed to the RSP agent.
 from typing import List, Tuple
 from graphs.recursive_graph import Graph, RecursiveGraphGenerator
 
-# These globals will be initialised once per episode by the Game handler
+# Module-level default episode, (re)initialised by `_init_graph` — called by
+# the run script and again by the Game handler.  `G` and the module-level
+# tools below always refer to the most recent call.
 G: Graph | None = None
-_current: int | None = None      # agent's current node
-_path: List[int] = []            # growing path (for convenience)
+_state: "GameState | None" = None
+_last_init_kw: dict | None = None  # generator kwargs that produced G
+
+
+# --------------------------------------------------------------------------- #
+# Per-episode state                                                           #
+# --------------------------------------------------------------------------- #
+class GameState:
+    """
+    Graph plus the agent's position for one episode.
+
+    The tools are methods.  The module-level tools delegate to the default
+    state; callers running several episodes at once can register the bound
+    methods of their own `GameState` instead.
+    """
+
+    __slots__ = ("G", "current", "path")
+
+    def __init__(self, G: Graph) -> None:
+        self.G = G
+        self.current = G.start          # agent's current node
+        self.path = [G.start]           # growing path (for convenience)
+
+    # ----------------------------------------------------------------------- #
+    # TOOLS                                                                   #
+    # ----------------------------------------------------------------------- #
+    def observe(self) -> List[Tuple[int, float]]:
+        """
+        Returns a list of (neighbor_id, weight) pairs for the current node.
+        """
+        return [(nid, w) for nid, w in self.G.neighbors(self.current)]
+
+    def move(self, v: int) -> str:
+        """
+        Move the agent to neighbor `v`. Returns a confirmation string.
+        Uses undirected exploration - agent can move along edges in both directions.
+        Raises if v is not an undirected neighbor.
+        """
+        if v not in self.G.undirected_neighbor_ids(self.current):
+            # raise ValueError(f"{v} is not a neighbor of current node.")
+            return f"node {v} is not a neighbor of current node."
+        self.path.append(v)
+        self.current = v
+        return f"moved to node {v}."
+
+    def submit_solution(self, submission: list[int]) -> bool:
+        """
+        Agent submits a candidate start→end path.  Returns True if **optimal**.
+        """
+        return self.G.verify_shortest_path(submission)
+
+    def verify(self, submission: list[int]) -> bool:
+        """
+        Verifier function called by AbstractGame to check if submitted path is optimal.
+        This is the function referenced in the config's verifier.tool_name.
+        """
+        return self.G.verify_shortest_path(submission)
+
 
 # --------------------------------------------------------------------------- #
-# Helper to build a fresh graph each game                                     #
+# Helper to build a fresh game each episode                                   #
 # --------------------------------------------------------------------------- #
-def _init_graph(**kw):
-    global G, _current, _path
-    G = RecursiveGraphGenerator(**kw).build()
-    _current = G.start
-    _path = [G.start]
+def _init_graph(**kw) -> GameState:
+    """
+    Build the episode graph and reset the default state to its start node.
+
+    A seeded build is deterministic, so a repeat call with the same kwargs
+    (e.g. run script + game handler) reuses the existing graph.
+    """
+    global G, _state, _last_init_kw
+    if G is None or kw.get("seed") is None or kw != _last_init_kw:
+        G = RecursiveGraphGenerator(**kw).build()
+        _last_init_kw = dict(kw)
+    _state = GameState(G)
+    return _state
+
+
+def __getattr__(name: str):
+    # Read-only views of the default state under their historical names
+    if name == "_current":
+        return _state.current if _state is not None else None
+    if name == "_path":
+        return _state.path if _state is not None else []
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # --------------------------------------------------------------------------- #
-# TOOLS                                                                       #
+# TOOLS (default state)                                                       #
 # --------------------------------------------------------------------------- #
 def observe() -> List[Tuple[int, float]]:
     """
     Returns a list of (neighbor_id, weight) pairs for the current node.
     """
-    assert G is not None and _current is not None
-    return [(nid, w) for nid, w in G.neighbors(_current)]
-
+    assert _state is not None
+    return _state.observe()
 
 
 def move(v: int) -> str:
@@ -37,22 +111,16 @@ def move(v: int) -> str:
     Uses undirected exploration - agent can move along edges in both directions.
     Raises if v is not an undirected neighbor.
     """
-    assert G is not None and _current is not None
-    undirected_neighbors = G.undirected_neighbors(_current)
-    if v not in undirected_neighbors:
-        # raise ValueError(f"{v} is not a neighbor of current node.")
-        return f"node {v} is not a neighbor of current node."
-    _path.append(v)
-    globals()['_current'] = v
-    return f"moved to node {v}."
+    assert _state is not None
+    return _state.move(v)
 
 
 def submit_solution(submission: list[int]) -> bool:
     """
     Agent submits a candidate start→end path.  Returns True if **optimal**.
     """
-    assert G is not None
-    return G.verify_shortest_path(submission)
+    assert _state is not None
+    return _state.submit_solution(submission)
 
 
 def verify(submission: list[int]) -> bool:
@@ -60,5 +128,5 @@ def verify(submission: list[int]) -> bool:
     Verifier function called by AbstractGame to check if submitted path is optimal.
     This is the function referenced in the config's verifier.tool_name.
     """
-    assert G is not None
-    return G.verify_shortest_path(submission)
+    assert _state is not None
+    return _state.verify(submission)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-import heapq
 import random
-from collections import deque
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from graphs import _dijkstra_nb as nb
 
 ###############################################################################
 # Graph container                                                             #
@@ -13,45 +15,116 @@ from typing import Dict, List, Tuple, Optional
 @dataclass(slots=True)
 class Graph:
     """
-    Lightweight adjacency-list digraph.
+    Lightweight CSR digraph over dense node ids 0 … N-1.
+
+    Edges of `u` are `indices[indptr[u]:indptr[u+1]]` with weights
+    `data[indptr[u]:indptr[u+1]]`; the transpose (`rindptr`, `rindices`,
+    `rdata`) lists the edges *into* each node the same way.
 
-    `adj[u]` → list of `(v, w)` tuples (edge u→v with weight w).
+    `adj[u]` → list of `(v, w)` tuples (edge u→v with weight w), a dict view
+    built from the arrays on first use.
     """
 
-    adj: Dict[int, List[Tuple[int, float]]]
+    indptr: np.ndarray               # int32[N+1]
+    indices: np.ndarray              # int32[E]
+    data: np.ndarray                 # float64[E]
+    rindptr: np.ndarray              # int32[N+1]  (reverse CSR)
+    rindices: np.ndarray             # int32[E]
+    rdata: np.ndarray                # float64[E]
     start: int
     end: int
     optimal_path_cost: float         # minimal total weight start→end
     optimal_path: List[int]          # sequence of node IDs achieving that cost
 
+    # Dict view behind the `adj` property (None until first use)
+    _adj: Optional[Dict[int, List[Tuple[int, float]]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Per-node memo of the tool-facing neighbor queries (graph is immutable)
+    _neighbors_cache: Dict[int, Tuple[Tuple[int, float], ...]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _undirected_cache: Dict[int, Tuple[int, ...]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _neighbor_ids_cache: Dict[int, frozenset[int]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _undirected_ids_cache: Dict[int, frozenset[int]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    @property
+    def adj(self) -> Dict[int, List[Tuple[int, float]]]:
+        if self._adj is None:
+            ptr = self.indptr.tolist()
+            ind = self.indices.tolist()
+            dat = self.data.tolist()
+            self._adj = {
+                u: list(zip(ind[ptr[u]:ptr[u + 1]], dat[ptr[u]:ptr[u + 1]]))
+                for u in range(len(ptr) - 1)
+            }
+        return self._adj
+
     # ------------------------------------------------------------------#
     # Basic helpers                                                      #
     # ------------------------------------------------------------------#
-    def neighbors(self, u: int) -> List[Tuple[int, float]]:
-        return self.adj.get(u, [])
-
-    def undirected_neighbors(self, u: int) -> List[int]:
+    def neighbors(self, u: int) -> Tuple[Tuple[int, float], ...]:
+        try:
+            return self._neighbors_cache[u]
+        except KeyError:
+            lo, hi = self._row(u)
+            es = self._neighbors_cache[u] = tuple(
+                zip(self.indices[lo:hi].tolist(), self.data[lo:hi].tolist())
+            )
+            return es
+
+    def incoming(self, u: int) -> List[Tuple[int, float]]:
+        lo, hi = self._row(u, self.rindptr)
+        return list(zip(self.rindices[lo:hi].tolist(), self.rdata[lo:hi].tolist()))
+
+    def undirected_neighbors(self, u: int) -> Tuple[int, ...]:
         """
         Return neighbor node IDs for undirected exploration - includes both outgoing and incoming edges.
-        For incoming edges, we traverse the graph to find all nodes that have edges to u.
-        Returns only node IDs, no weights.
+        Incoming edges come from the reverse CSR.
+        Returns only node IDs, no weights; memoised per node.
         """
-        neighbors_set = set()
-        
-        # Add outgoing neighbors
-        for v, w in self.adj.get(u, []):
-            neighbors_set.add(v)
-        
-        # Add incoming neighbors (reverse direction)
-        for node, edges in self.adj.items():
-            for target, weight in edges:
-                if target == u and node != u:
-                    neighbors_set.add(node)
-        
-        return list(neighbors_set)
+        try:
+            return self._undirected_cache[u]
+        except KeyError:
+            ids = self._undirected_cache[u] = tuple(self.undirected_neighbor_ids(u))
+            return ids
+
+    def neighbor_ids(self, u: int) -> frozenset[int]:
+        """Outgoing neighbor IDs of *u* as a set, for O(1) membership tests."""
+        try:
+            return self._neighbor_ids_cache[u]
+        except KeyError:
+            lo, hi = self._row(u)
+            ids = self._neighbor_ids_cache[u] = frozenset(self.indices[lo:hi].tolist())
+            return ids
+
+    def undirected_neighbor_ids(self, u: int) -> frozenset[int]:
+        """Set form of `undirected_neighbors(u)`."""
+        try:
+            return self._undirected_ids_cache[u]
+        except KeyError:
+            lo, hi = self._row(u, self.rindptr)
+            ids = self._undirected_ids_cache[u] = self.neighbor_ids(u) | frozenset(
+                v for v in self.rindices[lo:hi].tolist() if v != u
+            )
+            return ids
+
+    def _row(self, u: int, indptr: Optional[np.ndarray] = None) -> Tuple[int, int]:
+        """Bounds of *u*'s row in `indptr` (default: outgoing CSR); empty for unknown ids."""
+        if indptr is None:
+            indptr = self.indptr
+        if isinstance(u, (int, np.integer)) and 0 <= u < len(indptr) - 1:
+            return int(indptr[u]), int(indptr[u + 1])
+        return 0, 0
 
     def n_nodes(self) -> int:
-        return len(self.adj)
+        return len(self.indptr) - 1
 
     # ------------------------------------------------------------------#
     # Path utilities                                                     #
@@ -63,10 +136,14 @@ class Graph:
 
         cost = 0.0
         for u, v in zip(path, path[1:]):
-            edge_map = {dst: w for dst, w in self.adj.get(u, [])}
-            if v not in edge_map:
+            # Scan u's CSR row; out-degree is at most max_edges
+            lo, hi = self._row(u)
+            for k in range(lo, hi):
+                if self.indices[k] == v:
+                    cost += float(self.data[k])
+                    break
+            else:
                 raise ValueError(f"Edge {u}→{v} absent in graph")
-            cost += edge_map[v]
         return cost
 
     def verify_shortest_path(self, path: List[int]) -> bool:
@@ -88,6 +165,18 @@ class RecursiveGraphGenerator:
     Exactly one of `weight_choices` or `weight_range` must be provided.
     """
 
+    __slots__ = (
+        "base_nodes",
+        "max_edges",
+        "recursion_depth",
+        "_rand",
+        "_weight_choices",
+        "_weight_range",
+        "_tpl_start",
+        "_tpl_end",
+        "_tpl_adj",
+    )
+
     # ------------------------------------------------------------------#
     # Constructor                                                        #
     # ------------------------------------------------------------------#
@@ -122,42 +211,33 @@ class RecursiveGraphGenerator:
         self._tpl_end = base_nodes - 1
         self._tpl_adj = self._build_template()
 
-        # Global node-id counter (template ids: 0 … base_nodes-1)
-        self._next_id = self.base_nodes
-
     # ------------------------------------------------------------------#
     # Public API                                                         #
     # ------------------------------------------------------------------#
     def build(self) -> Graph:
         """Return the fully expanded graph with cached optimal path+cost."""
-        # Copy template into global graph
-        g_adj: Dict[int, List[Tuple[int, float]]] = {
-            u: list(vs) for u, vs in self._tpl_adj.items()
-        }
-        g_start = 0
-        g_end = self.base_nodes - 1  # updated as we recurse deeper
-
-        # BFS expansion queue (node_id, depth)
-        q = deque((u, 1) for u in range(self.base_nodes))
-
-        while q:
-            node_id, depth = q.popleft()
-            if depth > self.recursion_depth:
-                continue
-
-            inner_nodes, sub_end = self._expand_node(node_id, g_adj)
-
-            if node_id == g_end:
-                g_end = sub_end
-
-            if depth < self.recursion_depth:
-                q.extend((v, depth + 1) for v in inner_nodes)
-
-        # Compute global optimal path once
-        opt_cost, opt_path = self._dijkstra_with_path(g_adj, g_start, g_end)
+        indptr, indices, data, g_start, g_end = self._expand_csr()
+        jit = len(indptr) - 1 >= nb.JIT_MIN_NODES and nb.enable_jit()
+
+        # Compute global optimal path once.  Compiled, search from both ends;
+        # with a single edge weight the cost is hops × weight, so BFS suffices.
+        csr = (indptr, indices, data)
+        rcsr = self._transpose_csr(indptr, indices, data)
+        uniform_w = self._uniform_weight()
+        if not jit:
+            opt_cost, opt_path = self._dijkstra_lists(csr, g_start, g_end)
+        elif uniform_w is not None:
+            opt_cost, opt_path = self._bidirectional_bfs(csr, rcsr, g_start, g_end, uniform_w)
+        else:
+            opt_cost, opt_path = self._bidirectional_dijkstra(csr, rcsr, g_start, g_end)
 
         return Graph(
-            adj=g_adj,
+            indptr=indptr,
+            indices=indices,
+            data=data,
+            rindptr=rcsr[0],
+            rindices=rcsr[1],
+            rdata=rcsr[2],
             start=g_start,
             end=g_end,
             optimal_path_cost=opt_cost,
@@ -167,106 +247,186 @@ class RecursiveGraphGenerator:
     # ------------------------------------------------------------------#
     # Template construction                                              #
     # ------------------------------------------------------------------#
-    def _build_template(self) -> Dict[int, List[Tuple[int, float]]]:
+    def _build_template(self) -> List[List[Tuple[int, float]]]:
         """Random connected base graph; end node has **no outgoing edges**."""
-        adj: Dict[int, List[Tuple[int, float]]] = {i: [] for i in range(self.base_nodes)}
+        # Pick the edge structure first, then draw all weights in one batch
+        out: List[List[int]] = [[] for _ in range(self.base_nodes)]
 
         # Backbone 0→1→…→N-1
         for u in range(self.base_nodes - 1):
-            adj[u].append((u + 1, self._sample_weight()))
+            out[u].append(u + 1)
 
         end_node = self.base_nodes - 1
 
         # Extra edges (skip end_node as source)
         for u in range(self.base_nodes - 1):
-            room = self.max_edges - len(adj[u])
+            room = self.max_edges - len(out[u])
             if room <= 0:
                 continue
             k_extra = self._rand.randint(0, room)
             if k_extra == 0:
                 continue
-            existing = {dst for dst, _ in adj[u]}
+            existing = set(out[u])
             cand = [v for v in range(self.base_nodes) if v != u and v not in existing]
-            for v in self._rand.sample(cand, k_extra):
-                adj[u].append((v, self._sample_weight()))
+            out[u].extend(self._rand.sample(cand, k_extra))
+
+        weights = iter(self._sample_weights(sum(map(len, out))))
+        adj: List[List[Tuple[int, float]]] = [
+            [(v, next(weights)) for v in dsts] for dsts in out
+        ]
 
         assert len(adj[end_node]) == 0, "Template end node must have no outgoing edges"
         return adj
 
     # ------------------------------------------------------------------#
-    # Node expansion                                                     #
+    # Recursive expansion                                                #
     # ------------------------------------------------------------------#
-    def _expand_node(
-        self,
-        node_id: int,
-        g_adj: Dict[int, List[Tuple[int, float]]],
-    ) -> Tuple[List[int], int]:
-        """Replace *node_id* with a fresh copy of the template."""
-        outgoing = g_adj.get(node_id, [])
-        g_adj[node_id] = []  # becomes sub-graph start
-
-        # Map template ids → global ids  (start inherits node_id)
-        mapping = {self._tpl_start: node_id}
-        for t in range(self.base_nodes):
-            if t == self._tpl_start:
-                continue
-            mapping[t] = self._next_id
-            self._next_id += 1
-
-        sub_end = mapping[self._tpl_end]
-
-        # Clone edges with id remapping
-        for t_src, t_edges in self._tpl_adj.items():
-            g_src = mapping[t_src]
-            dst_list = g_adj.setdefault(g_src, [])
-            for t_dst, w in t_edges:
-                dst_list.append((mapping[t_dst], w))
-
-        # Re-attach original outgoing edges to sub-graph end
-        g_adj[sub_end].extend(outgoing)
-
-        inner_nodes = [gid for gid in mapping.values() if gid != node_id]
-        return inner_nodes, sub_end
+    def _expand_csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int, int]:
+        """
+        Expand the template `recursion_depth` times; return CSR + start/end.
+
+        Expanding a node replaces it with a copy of the template: it keeps
+        its id as the copy's start, the other template nodes get base_nodes-1
+        fresh ids, and its outgoing edges move to the copy's end.  Level d
+        expands every node minted at level d-1 (level 1: the template), so
+        all copies of one level are built at once as flat edge arrays.
+
+        Rather than moving edges as nodes expand, each edge is emitted once
+        with its source resolved at the end: a node's outgoing edges end up
+        on its *deepest* end (end of the end of …), except the edges a copy
+        adds to its own start, which stay put.
+        """
+        b = self.base_nodes
+        t = self._tpl_adj
+        tpl_src = np.array([u for u, es in enumerate(t) for _ in es], dtype=np.int64)
+        tpl_dst = np.array([v for es in t for v, _ in es], dtype=np.int64)
+        tpl_w = np.array([w for es in t for _, w in es], dtype=np.float64)
+        tpl_pin = tpl_src == self._tpl_start
+
+        n_levels = max(self.recursion_depth, 0)
+        n_total = b * sum((b - 1) ** d for d in range(n_levels + 1))
+
+        # Level 0: the template itself; no edge is pinned to its source
+        srcs, dsts, ws, pins = [tpl_src], [tpl_dst], [tpl_w], [np.zeros_like(tpl_pin)]
+        end_of = np.arange(n_total, dtype=np.int64)   # node → end of its copy
+        expanded: List[np.ndarray] = []
+        frontier = np.arange(b, dtype=np.int64)
+        next_id = b
+
+        for _ in range(n_levels):
+            k = len(frontier)
+            # Row i maps template ids → global ids for the copy of frontier[i]
+            ids = np.empty((k, b), dtype=np.int64)
+            ids[:, self._tpl_start] = frontier
+            ids[:, 1:] = np.arange(next_id, next_id + k * (b - 1)).reshape(k, b - 1)
+            next_id += k * (b - 1)
+
+            srcs.append(ids[:, tpl_src].ravel())
+            dsts.append(ids[:, tpl_dst].ravel())
+            ws.append(np.tile(tpl_w, k))
+            pins.append(np.tile(tpl_pin, k))
+            end_of[frontier] = ids[:, self._tpl_end]
+
+            expanded.append(frontier)
+            frontier = ids[:, 1:].ravel()
+        assert next_id == n_total
+
+        # A copy's end is expanded one level further down; resolve deepest first
+        for level in reversed(expanded):
+            end_of[level] = end_of[end_of[level]]
+
+        src = np.concatenate(srcs)
+        pin = np.concatenate(pins)
+        src = np.where(pin, src, end_of[src])
+        dst = np.concatenate(dsts)
+        w = np.concatenate(ws)
+
+        # Group by source (stable, so each row keeps creation order)
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(n_total + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=n_total), out=indptr[1:])
+        indices = dst[order].astype(np.int32)
+        data = w[order]
+
+        return indptr, indices, data, 0, int(end_of[self._tpl_end])
 
     # ------------------------------------------------------------------#
     # Weight sampler                                                     #
     # ------------------------------------------------------------------#
-    def _sample_weight(self) -> float:
+    def _sample_weights(self, n: int) -> List[float]:
+        # Templates have a few hundred edges at most; the stdlib generator
+        # draws them faster than numpy.random costs to import and seed
         if self._weight_choices is not None:
-            return self._rand.choice(self._weight_choices)
+            return self._rand.choices(self._weight_choices, k=n)
         lo, hi = self._weight_range  # type: ignore[assignment]
-        return self._rand.uniform(lo, hi)
+        uniform = self._rand.uniform
+        return [uniform(lo, hi) for _ in range(n)]
+
+    def _uniform_weight(self) -> float | None:
+        """The one weight every edge gets, or None if weights can differ."""
+        if self._weight_choices is not None:
+            if len(set(self._weight_choices)) == 1:
+                return float(self._weight_choices[0])
+            return None
+        lo, hi = self._weight_range  # type: ignore[assignment]
+        return float(lo) if lo == hi else None
+
+    # ------------------------------------------------------------------#
+    # Private: CSR transpose                                             #
+    # ------------------------------------------------------------------#
+    @staticmethod
+    def _transpose_csr(
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """CSR of the reversed graph: row `v` lists the sources of edges into `v`."""
+        n = len(indptr) - 1
+        src = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+        order = np.argsort(indices, kind="stable")
+        rindptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(indices, minlength=n), out=rindptr[1:])
+        return rindptr, src[order], data[order]
 
     # ------------------------------------------------------------------#
-    # Private: Dijkstra with path reconstruction                         #
+    # Private: shortest-path search with path reconstruction             #
     # ------------------------------------------------------------------#
     @staticmethod
-    def _dijkstra_with_path(
-        adj: Dict[int, List[Tuple[int, float]]],
+    def _bidirectional_dijkstra(
+        csr: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        rcsr: Tuple[np.ndarray, np.ndarray, np.ndarray],
         start: int,
         end: int,
     ) -> Tuple[float, List[int]]:
-        pq: List[Tuple[float, int]] = [(0.0, start)]
-        best: Dict[int, float] = {start: 0.0}
-        prev: Dict[int, Optional[int]] = {start: None}
-
-        while pq:
-            cost_u, u = heapq.heappop(pq)
-            if u == end:
-                path: List[int] = []
-                while u is not None:
-                    path.append(u)
-                    u = prev[u]
-                return cost_u, path[::-1]
-
-            if cost_u > best[u]:
-                continue
+        cost, meet, prev_f, next_b = nb.bidirectional_dijkstra_csr(*csr, *rcsr, start, end)
+        if cost == float("inf"):
+            raise ValueError("Graph is not connected from start to end")
 
-            for v, w in adj.get(u, []):
-                alt = cost_u + w
-                if v not in best or alt < best[v]:
-                    best[v] = alt
-                    prev[v] = u
-                    heapq.heappush(pq, (alt, v))
+        # start … meet (forward tree), then meet … end (backward tree)
+        return float(cost), nb.stitch_path(prev_f, next_b, meet).tolist()
 
-        raise ValueError("Graph is not connected from start to end")
\ No newline at end of file
+    @staticmethod
+    def _dijkstra_lists(
+        csr: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        start: int,
+        end: int,
+    ) -> Tuple[float, List[int]]:
+        cost, path = nb.dijkstra_lists(*(a.tolist() for a in csr), start, end)
+        if not path:
+            raise ValueError("Graph is not connected from start to end")
+        return float(cost), path
+
+    @staticmethod
+    def _bidirectional_bfs(
+        csr: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        rcsr: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        start: int,
+        end: int,
+        weight: float,
+    ) -> Tuple[float, List[int]]:
+        hops, meet, prev_f, next_b = nb.bidirectional_bfs_csr(
+            csr[0], csr[1], rcsr[0], rcsr[1], start, end
+        )
+        if hops == -1:
+            raise ValueError("Graph is not connected from start to end")
+        return float(hops) * weight, nb.stitch_path(prev_f, next_b, meet).tolist()
@@ -1,9 +1,9 @@
 import argparse
+import inspect as stdinspect
 from local_workflow.agent import BaseAgent
 from local_workflow.local_logging.utils import setup_logs, configure_logging
 from local_workflow import environment
 from external_tools import observe, move, submit_solution, verify, _init_graph
-import inspect
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -37,7 +37,7 @@ if __name__ == "__main__":
 
     env_classes = {
         name: cls
-        for name, cls in inspect.getmembers(environment, inspect.isclass)
+        for name, cls in stdinspect.getmembers(environment, stdinspect.isclass)
         if cls.__module__ == environment.__name__
     }
 